@@ -1,6 +1,7 @@
-import json
+import orjson
 import uvicorn
-from fastapi import FastAPI, Request
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 from utils.configs import configs, MyLogger
@@ -9,7 +10,14 @@ from utils.data_util import extract_plex_json
 
 logger = MyLogger()
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# 所有请求共用一个 BangumiApi，复用 requests.Session 的连接池（免去每次 TCP/TLS 握手）和查询缓存
+bgm = BangumiApi(
+    username=configs.raw.get('bangumi', 'username', fallback=''),
+    access_token=configs.raw.get('bangumi', 'access_token', fallback=''),
+    private=configs.raw.getboolean('bangumi', 'private', fallback=False),
+    http_proxy=configs.raw.get('bangumi', 'script_proxy', fallback=''))
 
 
 class CustomItem(BaseModel):
@@ -23,8 +31,9 @@ class CustomItem(BaseModel):
 
 
 # 自定义同步
+# 同步过程中的 bangumi 请求均为阻塞调用，定义为普通函数，由线程池执行，避免阻塞事件循环
 @app.post("/Custom")
-async def custom_sync(item: CustomItem):
+def custom_sync(item: CustomItem):
     logger.info(f'接收到同步请求：{item}')
 
     # 检查记录类型是否为单集
@@ -45,26 +54,18 @@ async def custom_sync(item: CustomItem):
         return
 
     # 根据同步模式判断是否跳过其它用户
-    mode = configs.raw.get('sync', 'mode', fallback='single')
-    if mode == 'single':
-        single_username = configs.raw.get('sync', 'single_username', fallback='')
-        if single_username:
-            if item.user_name != single_username:
+    if configs.sync_mode == 'single':
+        if configs.single_username:
+            if item.user_name != configs.single_username:
                 logger.debug(f'非配置同步用户，跳过')
                 return
         else:
             logger.error(f'未设置同步用户single_username，请检查config.ini配置')
             return
 
-    bgm = BangumiApi(
-        username=configs.raw.get('bangumi', 'username', fallback=''),
-        access_token=configs.raw.get('bangumi', 'access_token', fallback=''),
-        private=configs.raw.getboolean('bangumi', 'private', fallback=False),
-        http_proxy=configs.raw.get('bangumi', 'script_proxy', fallback=''))
-
     # 获取自定义映射
     mapping_item = item.title
-    mapping_subject_id = configs.raw.get('bangumi-mapping', mapping_item, fallback='')
+    mapping_subject_id = configs.get_mapping(mapping_item)
     if mapping_subject_id:
         logger.debug(f'匹配到自定义映射：{mapping_item}={mapping_subject_id}')
         subject_id = mapping_subject_id
@@ -100,10 +101,10 @@ async def custom_sync(item: CustomItem):
 
 
 # Plex同步
-@app.post("/Plex")
-async def plex_sync(plex_request: Request):
+@app.post("/Plex", status_code=202)
+async def plex_sync(plex_request: Request, background_tasks: BackgroundTasks):
     json_str = await plex_request.body()
-    plex_data = json.loads(extract_plex_json(json_str))
+    plex_data = orjson.loads(extract_plex_json(json_str))
 
     # 检查同步类型是否为看过
     if plex_data["event"] != 'media.scrobble':
@@ -128,13 +129,21 @@ async def plex_sync(plex_request: Request):
     logger.debug(f'重新组装 JSON 报文：{plex_json}')
 
     plex_json = CustomItem(**plex_json)
-    # 重组成自定义标准格式后调用自定义同步
-    await custom_sync(plex_json)
+    # 重组成自定义标准格式后，交由后台任务调用自定义同步
+    background_tasks.add_task(custom_sync, plex_json)
 
 
 # Emby同步
-@app.post("/Emby")
-async def emby_sync(emby_data: dict):
+@app.post("/Emby", status_code=202)
+async def emby_sync(emby_request: Request, background_tasks: BackgroundTasks):
+    json_str = await emby_request.body()
+    try:
+        emby_data = orjson.loads(json_str)
+    except orjson.JSONDecodeError:
+        emby_data = None
+    if not isinstance(emby_data, dict):
+        logger.error(f'Emby同步请求报文格式错误，跳过：{json_str[:200]}')
+        raise HTTPException(status_code=422, detail='请求报文不是有效的 JSON 对象')
     logger.debug(f'接收到Emby同步请求：{emby_data}')
 
     # 检查同步类型是否为看过
@@ -161,15 +170,15 @@ async def emby_sync(emby_data: dict):
     logger.debug(f'重新组装 JSON 报文：{emby_json}')
 
     emby_json = CustomItem(**emby_json)
-    # 重组成自定义标准格式后调用自定义同步
-    await custom_sync(emby_json)
+    # 重组成自定义标准格式后，交由后台任务调用自定义同步
+    background_tasks.add_task(custom_sync, emby_json)
 
 
 # Jellyfin同步
-@app.post("/Jellyfin")
-async def jellyfin_sync(jellyfin_request: Request):
+@app.post("/Jellyfin", status_code=202)
+async def jellyfin_sync(jellyfin_request: Request, background_tasks: BackgroundTasks):
     json_str = await jellyfin_request.body()
-    jellyfin_data = json.loads(json_str)
+    jellyfin_data = orjson.loads(json_str)
     logger.debug(f'接收到Jellyfin同步请求：{jellyfin_data}')
 
     # 检查事件类型是否为停止播放
@@ -196,8 +205,8 @@ async def jellyfin_sync(jellyfin_request: Request):
     logger.debug(f'重新组装 JSON 报文：{jellyfin_json}')
 
     jellyfin_json = CustomItem(**jellyfin_json)
-    # 重组成自定义标准格式后调用自定义同步
-    await custom_sync(jellyfin_json)
+    # 重组成自定义标准格式后，交由后台任务调用自定义同步
+    background_tasks.add_task(custom_sync, jellyfin_json)
 
 
 uvicorn_logging_config = {
@@ -2,19 +2,53 @@ import datetime
 import difflib
 import functools
 import os
+import threading
+import time
 import requests
 from .configs import MyLogger
 
 logger = MyLogger()
 
 
+def ttl_cache(ttl=300, maxsize=128):
+    """带过期时间的缓存，条目超过 ttl 秒后重新请求，避免长期运行时拿到过期的番剧/剧集信息
+    只缓存正常返回的结果，被装饰函数抛出异常时不写入缓存，失败的请求需以异常表示"""
+    def decorator(func):
+        cache = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with lock:
+                hit = cache.get(key)
+            if hit and hit[0] > now:
+                return hit[1]
+            result = func(*args, **kwargs)
+            with lock:
+                if len(cache) >= maxsize:
+                    for k in [k for k, v in cache.items() if v[0] <= now]:
+                        del cache[k]
+                    if len(cache) >= maxsize:
+                        del cache[next(iter(cache))]
+                cache[key] = (now + ttl, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
 class BangumiApi:
-    def __init__(self, username=None, access_token=None, private=True, http_proxy=None):
+    def __init__(self, username=None, access_token=None, private=True, http_proxy=None, timeout=10):
         self.host = 'https://api.bgm.tv/v0'
         self.username = username
         self.access_token = access_token
         self.private = private
         self.http_proxy = http_proxy
+        # requests 默认不超时，bangumi 无响应时会一直占用线程池
+        self.timeout = timeout
         self.req = requests.Session()
         self._req_not_auth = requests.Session()
         self.init()
@@ -31,22 +65,22 @@ class BangumiApi:
 
     def get(self, path, params=None):
         res = self.req.get(f'{self.host}/{path}',
-                           params=params)
+                           params=params, timeout=self.timeout)
         return res
 
     def post(self, path, _json, params=None):
         res = self.req.post(f'{self.host}/{path}',
-                            json=_json, params=params)
+                            json=_json, params=params, timeout=self.timeout)
         return res
 
     def put(self, path, _json, params=None):
         res = self.req.put(f'{self.host}/{path}',
-                           json=_json, params=params)
+                           json=_json, params=params, timeout=self.timeout)
         return res
 
     def patch(self, path, _json, params=None):
         res = self.req.patch(f'{self.host}/{path}',
-                             json=_json, params=params)
+                             json=_json, params=params, timeout=self.timeout)
         return res
 
     def get_me(self):
@@ -57,7 +91,7 @@ class BangumiApi:
             raise ValueError('BangumiApi: 未授权, access_token不正确或未设置')
         return res.json()
 
-    @functools.lru_cache
+    @ttl_cache()
     def search(self, title, start_date, end_date, limit=5, list_only=True):
         res = self._req_not_auth.post(f'{self.host}/search/subjects',
                                       json={'keyword': title,
@@ -65,35 +99,45 @@ class BangumiApi:
                                                        'air_date': [f'>={start_date}',
                                                                     f'<{end_date}'],
                                                        'nsfw': True}},
-                                      params={'limit': limit}, )
+                                      params={'limit': limit}, timeout=self.timeout)
+        res.raise_for_status()
         res = res.json()
         return res['data'] if list_only else res
 
-    @functools.lru_cache
     def search_old(self, title, list_only=True):
-        res = self.req.get(f'{self.host[:-2]}/search/subject/{title}', params={'type': 2})
+        # 请求失败或返回非 JSON 时按无结果处理，但不写入缓存，下次同步会重新请求
         try:
-            res = res.json()
-        except Exception:
+            res = self._search_old(title)
+        except (ValueError, requests.HTTPError):
             res = {'results': 0, 'list': []}
         return res['list'] if list_only else res
 
-    @functools.lru_cache
+    @ttl_cache()
+    def _search_old(self, title):
+        res = self.req.get(f'{self.host[:-2]}/search/subject/{title}', params={'type': 2},
+                           timeout=self.timeout)
+        res.raise_for_status()
+        return res.json()
+
+    @ttl_cache()
     def get_subject(self, subject_id):
         res = self.get(f'subjects/{subject_id}')
+        res.raise_for_status()
         return res.json()
 
-    @functools.lru_cache
+    @ttl_cache()
     def get_related_subjects(self, subject_id):
         res = self.get(f'subjects/{subject_id}/subjects')
+        res.raise_for_status()
         return res.json()
 
-    @functools.lru_cache
+    @ttl_cache()
     def get_episodes(self, subject_id, _type=0):
         res = self.get('episodes', params={
             'subject_id': subject_id,
             'type': _type,
         })
+        res.raise_for_status()
         return res.json()
 
     def get_target_season_episode_id(self, subject_id, target_season: int, target_ep: int):
@@ -114,33 +158,33 @@ class BangumiApi:
                         continue
                 episodes = self.get_episodes(current_id)
                 ep_info = episodes['data']
-                _target_ep = [i for i in ep_info if i['sort'] == target_ep]
+                _target_ep = next((i for i in ep_info if i['sort'] == target_ep), None)
                 if _target_ep:
-                    return current_id, _target_ep[0]['id']
+                    return current_id, _target_ep['id']
                 normal_season = True if episodes['total'] > 3 and ep_info[0]['sort'] <= 1 else False
                 if not fist_part and normal_season:
                     break
                 related = self.get_related_subjects(current_id)
-                next_id = [i for i in related if i['relation'] == '续集']
+                next_id = next((i for i in related if i['relation'] == '续集'), None)
                 if not next_id:
                     break
-                current_id = next_id[0]['id']
+                current_id = next_id['id']
                 fist_part = False
             return None, None if target_ep else None
 
         while True:
             related = self.get_related_subjects(current_id)
-            next_id = [i for i in related if i['relation'] == '续集']
+            next_id = next((i for i in related if i['relation'] == '续集'), None)
             if not next_id:
                 break
-            current_id = next_id[0]['id']
+            current_id = next_id['id']
             current_info = self.get_subject(current_id)
             if current_info['platform'] != 'TV':
                 continue
             episodes = self.get_episodes(current_id)
             ep_info = episodes['data']
             normal_season = True if episodes['total'] > 3 and ep_info[0]['sort'] <= 1 else False
-            _target_ep = [i for i in ep_info if i['sort'] == target_ep]
+            _target_ep = next((i for i in ep_info if i['sort'] == target_ep), None)
             ep_found = True if target_ep and _target_ep else False
             if normal_season:
                 season_num += 1
@@ -151,7 +195,7 @@ class BangumiApi:
                     return current_id
                 if not ep_found:
                     continue
-                return current_id, _target_ep[0]['id']
+                return current_id, _target_ep['id']
         return None, None if target_ep else None
 
     def get_subject_collection(self, subject_id):
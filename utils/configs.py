@@ -2,7 +2,7 @@ import datetime
 import os
 import platform
 import sys
-from configparser import ConfigParser
+from configparser import ConfigParser, NoSectionError
 
 
 def mini_conf():
@@ -18,15 +18,18 @@ raw_stdout = sys.stdout
 
 class Stdout:
 
-    def __init__(self):
-        self.log_file = mini_conf().get('dev', 'log_file', fallback='')
+    def __init__(self, log_file=''):
+        self.log_file = log_file
         if self.log_file:
             if self.log_file.startswith('./'):
                 cwd = os.path.dirname(os.path.dirname(__file__))
                 self.log_file = os.path.join(cwd, self.log_file.split('./', 1)[1])
-            mode = 'a' if os.path.exists(self.log_file) and os.path.getsize(self.log_file) < 10 * 1024000 else 'w'
-            if not os.path.exists(self.log_file):
+            try:
+                log_size = os.path.getsize(self.log_file)
+            except OSError:
+                log_size = None
                 os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+            mode = 'a' if log_size is not None and log_size < 10 * 1024000 else 'w'
             self.log_file = open(self.log_file, mode, encoding='utf-8')
 
     def write(self, *args, end=''):
@@ -42,8 +45,10 @@ class Stdout:
         pass
 
 
-if mini_conf().get('dev', 'log_file', fallback=''):
-    sys.stdout = Stdout()
+# 只读取一次日志路径配置，直接交给 Stdout，避免重复解析 config.ini
+_log_file = mini_conf().get('dev', 'log_file', fallback='')
+if _log_file:
+    sys.stdout = Stdout(_log_file)
     sys.stderr = sys.stdout
 
 
@@ -80,7 +85,8 @@ class MyLogger:
         print(t + args, end=end)
 
     def info(self, *args, end=None, silence=False):
-        if not silence and MyLogger.need_mix:
+        # 已由 Stdout 接管输出时，写入时会统一脱敏，这里不再重复处理
+        if not silence and MyLogger.need_mix and not isinstance(sys.stdout, Stdout):
             args = self.mix_args_str(*args)
         self.log(*args, end=end, silence=silence)
 
@@ -108,11 +114,25 @@ class Configs:
         MyLogger.log(MyLogger.mix_args_str(f'ini path: {self.path}'))
         MyLogger.log(f'{platform.platform(True)} Python-{platform.python_version()}')
         self.debug_mode = self.raw.getboolean('dev', 'debug', fallback=False)
+        self.sync_mode = self.raw.get('sync', 'mode', fallback='single')
+        self.single_username = self.raw.get('sync', 'single_username', fallback='')
+        # 自定义映射每次同步都会查询，启动时转为 dict，避免每次经过 ConfigParser 的插值处理
+        self.bangumi_mapping = self.section_dict('bangumi-mapping')
 
     def update(self):
         config = ConfigParser()
         config.read(self.path, encoding='utf-8-sig')
         return config
 
+    def section_dict(self, section):
+        try:
+            return dict(self.raw.items(section, raw=True))
+        except NoSectionError:
+            return {}
+
+    def get_mapping(self, title):
+        # ConfigParser 会对键名做 optionxform（默认转小写），查询时保持一致
+        return self.bangumi_mapping.get(self.raw.optionxform(title), '')
+
 
 configs = Configs()
@@ -13,10 +13,7 @@ def extract_plex_json(s):
     if end_index == -1:
         return None  # 如果找不到结束位置，则返回 None
 
-    # 截取 JSON 字符串
+    # 截取 JSON 字节串，orjson 可直接解析字节串，无需先解码为字符串
     json_bytes = s[start_index + 2:end_index + 3]  # 加上起始位置偏移量和长度
 
-    # 将字节串解码为字符串
-    json_str = json_bytes.decode('utf-8')  # 假设 JSON 字符串是 UTF-8 编码的
-
-    return json_str
+    return json_bytes